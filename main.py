@@ -1,15 +1,76 @@
+import argparse
+import glob
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import random
 import time
-import json
 import httpx
+import orjson
 
+from aiolimiter import AsyncLimiter
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
+from statistics import StatisticsError, fmean, median
 from tqdm import tqdm
-from tqdm.asyncio import tqdm as tqdm_asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 import asyncio
 
+try:
+    import uvloop
+except ImportError:  # uvloop doesn't support Windows
+    uvloop = None
+
 MARKET_API_ENDPOINT = "https://api.warframe.market/v1"
 DROPS_API_ENDPOINT = "https://drops.warframestat.us/data"
+# Where computed results are kept between runs
+CACHE_DIR = ".cache"
+# warframe.market allows around 3 requests per second per IP
+MARKET_RATE_LIMIT = 3
+# How long fetched market data is reused before it is requested again
+MARKET_DATA_TTL = 24 * 60 * 60
+# Stored with every market data record, bump it when the saved payload changes so
+# records written in an older format are fetched again
+MARKET_DATA_VERSION = 2
+# How many times a rate limited (429) or failed request is retried before giving up
+MAX_RETRIES = 6
+# Upper bound in seconds for the exponential backoff between retries
+MAX_BACKOFF = 30
+# Longest Retry-After in seconds that is waited out, a request asked to wait longer
+# is given up on like one that ran out of retries
+MAX_RETRY_AFTER = 60
+
+# Parsed JSON files keyed by path, stored alongside the mtime they were read at
+_CACHE: Dict[str, Any] = {}
+
+
+def load_json(path: str) -> Any:
+    """Load a JSON file, reusing the parsed result while the file is unchanged"""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        # Decode straight from the page cache instead of copying the file into memory
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped, memoryview(mapped) as view:
+            cached = (mtime, orjson.loads(view))
+        _CACHE[path] = cached
+    return cached[1]
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write data to a file without ever leaving it half written
+
+    The data goes to a temporary file first which then replaces the target,
+    the process id keeps concurrent runs from sharing a temporary file
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
 
 
 def check_update() -> bool:
@@ -18,25 +79,21 @@ def check_update() -> bool:
     This will return True if the data needs to be updated
     The data by default is updated every 24 hours
     """
-    needs_update = False
+    # relics.json is only ever replaced by a complete update, so its mtime
+    # tells us when the data was last fetched without having to parse it
     try:
-        with open("relics.json", "r") as file:
-            text = file.read()
-            if text == "":
-                needs_update = True
-            else:
-                relics = json.loads(text)
-                if (
-                    relics.get("timestamp")
-                    and relics.get("timestamp") + 24 * 60 * 60 < time.time()
-                ):
-                    needs_update = True
+        stat = os.stat("relics.json")
     except FileNotFoundError:
-        needs_update = True
-    return needs_update
+        return True
+    if stat.st_size == 0 or stat.st_mtime + 24 * 60 * 60 < time.time():
+        return True
+    # Files written before relics stored their intact name have to be fetched again,
+    # along with the items and market data that depend on them
+    relic_json = load_json("relics.json")
+    return not all("intactName" in relic for relic in relic_json["relics"].values())
 
 
-def get_relics(needs_update=False) -> bool:
+async def get_relics(client: httpx.AsyncClient, needs_update=False) -> Dict[str, Any]:
     """Gets all relics from the API and saves them to a file
 
     The format of the file is as follows:
@@ -45,6 +102,7 @@ def get_relics(needs_update=False) -> bool:
             "Lith A1 Intact": {
                 "urlName": "lith_a1_relic",
                 "relicName": "Lith A1 Intact",
+                "intactName": "Lith A1 Intact",
                 "rewards": [
                     {
                         "itemName": "Forma Blueprint",
@@ -76,40 +134,31 @@ def get_relics(needs_update=False) -> bool:
 
     url = f"{DROPS_API_ENDPOINT}/relics.json"
     try:
-        with open("relics.json", "r") as file:
-            text = file.read()
-            if text == "":
-                needs_update = True
+        if os.path.getsize("relics.json") == 0:
+            needs_update = True
     except FileNotFoundError:
         needs_update = True
     if needs_update:
-        with httpx.Client() as client:
-            response = client.get(url)
-            relic_json = response.json()
-            relics = {}
-            for relic in tqdm(relic_json.get("relics"), desc="Parsing Relics..."):
-                relic_name = (
-                    f"{relic.get('tier')} {relic.get('relicName')} {relic.get('state')}"
-                )
-                relic_url_name = (
-                    f"{relic.get('tier')}_{relic.get('relicName')}_relic".lower()
-                )
-                rewards = relic.get("rewards")
-                relics[relic_name] = {
-                    "urlName": relic_url_name,
-                    "relicName": relic_name,
-                    "rewards": rewards,
-                    "value": 0,
-                    "price": 0,
-                }
-            relic_json["relics"] = relics
-            relic_json["timestamp"] = time.time()
-        with open("relics.json", "w") as file:
-            relic_json["timestamp"] = time.time()
-            file.write(json.dumps(relic_json))
+        response = await client.get(url)
+        relic_json = orjson.loads(response.content)
+        relic_json["relics"] = {
+            (name := f"{relic['tier']} {relic['relicName']} {relic['state']}"): {
+                "urlName": f"{relic['tier']}_{relic['relicName']}_relic".lower(),
+                "relicName": name,
+                # Relics are priced by their intact version regardless of refinement
+                "intactName": f"{relic['tier']} {relic['relicName']} Intact",
+                "rewards": relic["rewards"],
+                "value": 0,
+                "price": 0,
+            }
+            for relic in relic_json["relics"]
+        }
+        atomic_write_bytes("relics.json", orjson.dumps(relic_json))
+        return relic_json
+    return load_json("relics.json")
 
 
-def get_items(needs_update=False) -> bool:
+def get_items(needs_update=False, relics=None, progress=False) -> Dict[str, Any]:
     """Parse the relics and get all items from them
 
     This will save the items to a file later to be used for calculating most valuable relics
@@ -124,213 +173,356 @@ def get_items(needs_update=False) -> bool:
     }
     """
 
-    relics = {}
-    with open("relics.json", "r") as file:
-        relics = json.loads(file.read())
+    if relics is None:
+        relics = load_json("relics.json")
 
     try:
-        with open("items.json", "r") as file:
-            text = file.read()
-            if text == "":
-                needs_update = True
+        if os.path.getsize("items.json") == 0:
+            needs_update = True
     except FileNotFoundError:
         needs_update = True
 
     if needs_update:
-        items = {}
-        relics = relics.get("relics")
-        for relic in tqdm(relics, desc="Parsing Items from Relics..."):
-            for reward in relics[relic]["rewards"]:
-                if reward["itemName"] not in items.keys():
-                    items[reward["itemName"]] = {
-                        "rarity": reward["rarity"],
-                        "chance": reward["chance"],
-                        "urlName": reward["itemName"]
-                        .replace(" ", "_")
-                        .lower()
-                        .replace("&", "and"),
-                        "itemName": reward["itemName"],
-                    }
-        with open("items.json", "w") as file:
-            file.write(json.dumps(items))
+        # Later rewards overwrite earlier ones, only the names are used afterwards
+        items = {
+            reward["itemName"]: {
+                "rarity": reward["rarity"],
+                "chance": reward["chance"],
+                "urlName": reward["itemName"]
+                .replace(" ", "_")
+                .lower()
+                .replace("&", "and"),
+                "itemName": reward["itemName"],
+            }
+            for relic in tqdm(
+                relics["relics"].values(),
+                desc="Parsing Items from Relics...",
+                disable=not progress,
+            )
+            for reward in relic["rewards"]
+        }
+        atomic_write_bytes("items.json", orjson.dumps(items))
+        return items
+    return load_json("items.json")
+
+
+def get_retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+    """Get how many seconds to wait before retrying a rate limited request
+
+    This honors the Retry-After header in both its seconds and HTTP-date forms
+    and falls back to exponential backoff when the header is missing or invalid
+    None is returned when the server asks to wait longer than MAX_RETRY_AFTER
+    """
+    retry_after = response.headers.get("Retry-After")
+    delay = None
+    if retry_after is not None:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                pass
+            else:
+                delay = retry_at.timestamp() - time.time()
+    # Values like "inf" or "nan" are treated the same as a missing header
+    if delay is None or not math.isfinite(delay):
+        return min(MAX_BACKOFF, 2**attempt)
+    if delay > MAX_RETRY_AFTER:
+        return None
+    return max(0.0, delay)
 
-    else:
-        with open("items.json", "r") as file:
-            items = json.loads(file.read())
+
+def is_current(record: List[Any]) -> bool:
+    """Check if a market data record was saved in the current format"""
+    return len(record) == 4 and record[3] == MARKET_DATA_VERSION
 
 
 async def get_info(
-    client: httpx.AsyncClient, item: str, item_url: str, item_api_uri: str
-) -> Dict[str, Any]:
+    client: httpx.AsyncClient,
+    limiter: AsyncLimiter,
+    item: str,
+    item_url: str,
+    item_api_uri: str,
+) -> Optional[Tuple[str, Dict[str, Any]]]:
     """Get all orders for an item
 
-    This will get all orders for an item and save them to a file
-    The format of the file is as follows:
-    [{
-        "ItemName": [{
-            "quantity": 1,
-            "platinum": 10,
-            "order_type": "sell",
-            "user": {
-                "status": "offline",
-                "ingame_name": "User",
-                "reputation_bonus": 0,
-                "reputation": 0,
-                "region": "en",
-                "id": "1234567890",
-                "avatar": "https://cdn.warframe.market/static/avatar/1234567890.png",
-                "last_seen": "2021-05-20T18:00:00.000Z"
-            },
-            "platform": "pc",
-            "visible": True,
-            "region": "en",
-            "creation_date": "2021-05-20T18:00:00.000Z",
-            "last_update": "2021-05-20T18:00:00.000Z",
-            "subtype": "intact"}]
-    }]
+    This will get all orders for an item, None is returned on errors
+    Only the sell orders of players that are in game are kept since those are the
+    prices that are actually available, and only their platinum is stored
+    Each line of the saved file is an [item, payload, fetched_at, version] record
+    The format of a line is as follows:
+    [
+        "ItemName", {"orders": [{
+            "platinum": 10
+        }]
+    }, 1700000000.0, 2]
     """
     url = f"{MARKET_API_ENDPOINT}/items/{item_url}/{item_api_uri}"
-    response = await client.get(url)
-    if response.status_code == 429:
-        await asyncio.sleep(1)
-        return await get_info(client, item, item_url, item_api_uri)
-    elif response.status_code != 200:
+    attempt = 0
+    while True:
+        try:
+            async with limiter:
+                response = await client.get(url)
+        except httpx.TransportError as error:
+            # Timeouts and dropped connections are retried like rate limits so a
+            # single network hiccup doesn't abort the whole download
+            if attempt == MAX_RETRIES:
+                print(f"Error on {item}: {error!r}")
+                return None
+            delay = min(MAX_BACKOFF, 2**attempt)
+        else:
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                break
+            delay = get_retry_delay(response, attempt)
+            if delay is None:
+                break
+        # Add up to a second of jitter so rate limited tasks don't all retry at once
+        await asyncio.sleep(delay + random.random())
+        attempt += 1
+    if response.status_code != 200:
         print(f"Error on {item}")
-        return {}
-    info = response.json()
-    return {item: info["payload"]}
+        return None
+    info = orjson.loads(response.content)
+    payload = info["payload"]
+    if item_api_uri == "orders":
+        payload = {
+            "orders": [
+                {"platinum": order["platinum"]}
+                for order in payload["orders"]
+                if order["order_type"] == "sell" and order["user"]["status"] == "ingame"
+            ]
+        }
+    return item, payload
 
 
 async def get_all_info(
     client: httpx.AsyncClient,
-    sem: asyncio.Semaphore,
+    limiter: AsyncLimiter,
     item_api_uri: str,
     needs_update=False,
-) -> bool:
-    # Helper function to make sure we don't make too many requests at once
-    async def safe_get_info(
-        client: httpx.AsyncClient, item: str, item_url: str, item_api_uri: str
-    ):
-        async with sem:
-            return await get_info(client, item, item_url, item_api_uri)
-
+    relics=None,
+    items=None,
+    ttl: float = MARKET_DATA_TTL,
+    workers: int = 10,
+):
+    # A fixed number of workers limits how many requests run at once and the
+    # limiter paces them to stay under the market's rate limit
+    path = f"{item_api_uri}.jsonl"
+    part_path = f"{path}.part"
     try:
-        with open(f"{item_api_uri}.json", "r") as file:
-            text = file.read()
-            if text == "":
-                needs_update = True
+        stat = os.stat(path)
+        if not needs_update and stat.st_size and stat.st_mtime + ttl > time.time():
+            # A fresh file written in an older format still has to be fetched again
+            with open(path, "rb") as file:
+                if is_current(orjson.loads(file.readline())):
+                    return
     except FileNotFoundError:
-        needs_update = True
-    if not needs_update:
-        return
-
-    with open("items.json", "r") as file:
-        items = json.loads(file.read())
-
-    with open("relics.json", "r") as file:
-        relics = json.loads(file.read())
-        relics = relics["relics"]
-
-    tasks = []
-
-    for relic in relics.items():
-        if "Intact" in relic[0]:
-            tasks.append(
-                safe_get_info(client, relic[0], relic[1]["urlName"], item_api_uri)
-            )
-    for item in items.items():
-        tasks.append(safe_get_info(client, item[0], item[1]["urlName"], item_api_uri))
-
-    results = await tqdm_asyncio.gather(
-        *tasks, desc=f"Getting {item_api_uri.capitalize()}..."
-    )
-    with open(f"{item_api_uri}.json", "w") as file:
-        file.write(json.dumps(results))
-
-
-def calculate_relic_values(live: bool = False):
-    with open("orders.json", "r") as file:
-        orders = json.loads(file.read())
-
-    with open("statistics.json", "r") as file:
-        statistics = json.loads(file.read())
-
-    order_dict = {}
-    for order in orders:
-        order_dict.update(order)
-
-    statistics_dict = {}
-    for statistic in statistics:
-        statistics_dict.update(statistic)
+        pass
+
+    if items is None:
+        items = load_json("items.json")
+    if relics is None:
+        relics = load_json("relics.json")
+
+    # Prices are needed for the intact relics and every item they can reward,
+    # collecting both into a set makes sure nothing is requested twice
+    targets = {
+        (name, relic["urlName"])
+        for name, relic in relics["relics"].items()
+        if "Intact" in name
+    } | {(name, item["urlName"]) for name, item in items.items()}
+
+    # Every record stores when it was fetched. Records younger than the ttl are
+    # reused, both from the last complete file and from a .part file left by a
+    # run that stopped half way
+    now = time.time()
+    fresh = {}
+    for cache_path in (path, part_path):
+        try:
+            with open(cache_path, "rb") as file:
+                for line in file:
+                    # The last record of an unfinished run may have been cut off
+                    if not line.endswith(b"\n"):
+                        break
+                    record = orjson.loads(line)
+                    if is_current(record) and record[2] + ttl > now:
+                        fresh[record[0]] = (record[2], line)
+        except FileNotFoundError:
+            pass
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for name, url_name in targets:
+        if name not in fresh:
+            queue.put_nowait((name, url_name))
+
+    # Write each response as soon as it arrives instead of holding them all in memory,
+    # the progress bar is redrawn at most twice a second. The .part file is only
+    # moved into place once every target is done
+    with open(part_path, "wb") as file, tqdm(
+        total=len(targets),
+        initial=len(targets) - queue.qsize(),
+        desc=f"Getting {item_api_uri.capitalize()}...",
+        mininterval=0.5,
+    ) as progress:
+        # When each written record was fetched, reused or not
+        fetched_at_times: List[float] = []
+        for name, _ in targets:
+            if name in fresh:
+                fetched_at, line = fresh[name]
+                file.write(line)
+                fetched_at_times.append(fetched_at)
+
+        async def work():
+            while not queue.empty():
+                name, url_name = queue.get_nowait()
+                result = await get_info(client, limiter, name, url_name, item_api_uri)
+                if result is not None:
+                    fetched_at = time.time()
+                    record = (*result, fetched_at, MARKET_DATA_VERSION)
+                    file.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+                    fetched_at_times.append(fetched_at)
+                progress.update()
+
+        await asyncio.gather(*(work() for _ in range(workers)))
+    os.replace(part_path, path)
+    # The early return above trusts the file's mtime, so backdate it to the oldest
+    # record to keep that record from outliving the ttl
+    if fetched_at_times:
+        oldest_fetched_at = min(fetched_at_times)
+        os.utime(path, (oldest_fetched_at, oldest_fetched_at))
+
+
+def load_market_data(item_api_uri: str) -> Dict[str, Any]:
+    """Load the payloads saved by get_all_info keyed by item name"""
+    # Decode the file line by line so only a single item's payload is parsed at a time
+    with open(f"{item_api_uri}.jsonl", "rb") as file:
+        return {name: payload for name, payload, *_ in map(orjson.loads, file)}
+
+
+def rank_relics(
+    live: bool = False,
+    relics=None,
+    order_dict=None,
+    statistics_dict=None,
+    progress=False,
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, float]]]:
+    """Rank all relics by expected value and by expected value divided by price
+
+    Returns the relics sorted by value and the relic names sorted by profit
+    """
+    if order_dict is None:
+        order_dict = load_market_data("orders")
+    if statistics_dict is None:
+        statistics_dict = load_market_data("statistics")
     median_plat = {}
 
     # This method looks at all live orders for an item and gets the median price for that item based on all current orders
     if live:
-        for item, orders in tqdm(order_dict.items(), desc="Calculating Median Plat..."):
-            median_plat[item] = 0
-            all_plat = []
-            for order in orders["orders"]:
-                if order["order_type"] == "sell":
-                    all_plat.append(order["platinum"])
-            all_plat.sort()
-            median_plat[item] = all_plat[len(all_plat) // 2]
+        for item, orders in tqdm(
+            order_dict.items(), desc="Calculating Median Plat...", disable=not progress
+        ):
+            all_plat = [order["platinum"] for order in orders["orders"]]
+            # Items nobody is selling have no price, like items without statistics
+            median_plat[item] = median(all_plat) if all_plat else float("inf")
 
     # Statistics based version of calculating median plat looking at the average of the median for the last week (7 days)
     else:
         for item in tqdm(
-            statistics_dict, desc="Calculating Median Plat (Statistics)..."
+            statistics_dict,
+            desc="Calculating Median Plat (Statistics)...",
+            disable=not progress,
         ):
-            median_plat[item] = 0
-            all_medians = []
             item_statistics = statistics_dict[item]["statistics_closed"]["90days"]
-            item_statistics.sort(key=lambda x: x["datetime"])
-            all_medians = [x["median"] for x in item_statistics[0:7]]
+            last_week = heapq.nlargest(7, item_statistics, key=itemgetter("datetime"))
             try:
-                median_plat[item] = round(sum(all_medians) / len(all_medians), 2)
-            except ZeroDivisionError:
+                median_plat[item] = round(fmean(x["median"] for x in last_week), 2)
+            except StatisticsError:
                 median_plat[item] = float("inf")
 
-    with open("relics.json", "r") as file:
-        relics = json.loads(file.read())
+    if relics is None:
+        relics = load_json("relics.json")
 
-    new_relics = dict()
-
-    for name, data in relics["relics"].items():
-        new_relics[name] = data
+    for data in relics["relics"].values():
+        # The relics may be shared with the load_json cache, so start from zero
+        data["value"] = 0
         for reward in data["rewards"]:
-            if reward["itemName"] in median_plat:
-                new_relics[name]["value"] += (
-                    median_plat[reward["itemName"]] * reward["chance"] / 100
-                )
-    sorted_relics = [x for x in new_relics.items()]
-    sorted_relics.sort(key=lambda x: x[1]["value"], reverse=True)
+            # Items without any price history are stored as inf, skip them so
+            # the value stays finite (orjson serializes inf/nan as null)
+            price = median_plat.get(reward["itemName"])
+            if price and math.isfinite(price):
+                data["value"] += price * reward["chance"] * 0.01
+    # The full ordering is saved for the menu, so sort once and slice the top 25
+    sorted_relics = sorted(
+        relics["relics"].items(), key=lambda x: x[1]["value"], reverse=True
+    )
+
+    value_divided_by_price = []
+    for relic in sorted_relics:
+        # Relics whose price couldn't be fetched are treated like relics without
+        # any price history and rank with a profit of 0
+        price = median_plat.get(relic[1]["intactName"], float("inf"))
+        value_divided_by_price.append((relic[0], round(relic[1]["value"] / price, 2)))
+    value_divided_by_price.sort(key=itemgetter(1), reverse=True)
+    return sorted_relics, value_divided_by_price
+
+
+def calculate_relic_values(
+    live: bool = False,
+    relics=None,
+    order_dict=None,
+    statistics_dict=None,
+    progress=False,
+):
+    # The rankings only depend on the data files, so they are cached on disk
+    # and reused for as long as none of those files have changed
+    cache_path = None
+    if order_dict is None and statistics_dict is None:
+        mtimes = [
+            os.stat(path).st_mtime_ns
+            for path in ("relics.json", "statistics.jsonl", "orders.jsonl")
+        ]
+        key = hashlib.sha1(orjson.dumps([*mtimes, live])).hexdigest()
+        cache_path = os.path.join(CACHE_DIR, f"relics_{key}.json")
+
+    if cache_path is not None and os.path.exists(cache_path):
+        sorted_relics, value_divided_by_price = load_json(cache_path)
+    else:
+        sorted_relics, value_divided_by_price = rank_relics(
+            live, relics, order_dict, statistics_dict, progress
+        )
+        if cache_path is not None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for old_cache in glob.glob(os.path.join(CACHE_DIR, "relics_*.json")):
+                os.remove(old_cache)
+            atomic_write_bytes(
+                cache_path, orjson.dumps([sorted_relics, value_divided_by_price])
+            )
+
     print("Top 25 Relics by value: ")
     print("------------------------")
     for relic in sorted_relics[0:25]:
         print(f"{relic[0]}: {relic[1]['value']:.2f}p")
-    with open("sorted_relics.json", "w") as file:
-        file.write(json.dumps(sorted_relics))
+    atomic_write_bytes("sorted_relics.json", orjson.dumps(sorted_relics))
 
-    value_divided_by_price = []
-    for relic in sorted_relics:
-        price = median_plat[" ".join(relic[0].split(" ")[0:2]) + " Intact"]
-        value_divided_by_price.append((relic[0], round(relic[1]["value"] / price, 2)))
-    value_divided_by_price.sort(key=lambda x: x[1], reverse=True)
     print("\n")
     print("Top 25 Relics by profit (EV/Price): ")
     print("------------------------")
     for relic in value_divided_by_price[0:25]:
         print(f"{relic[0]}: {relic[1]:.2f}")
-    with open("profit_relics.json", "w") as file:
-        file.write(json.dumps(value_divided_by_price))
+    atomic_write_bytes("profit_relics.json", orjson.dumps(value_divided_by_price))
     # TODO Add a list of most plat gained by refining past intact
 
 
 def open_menu():
-    with open("sorted_relics.json", "r") as file:
-        sorted_relics = json.loads(file.read())
-    with open("profit_relics.json", "r") as file:
-        profit_relics = json.loads(file.read())
+    with open("sorted_relics.json", "rb") as file:
+        sorted_relics = orjson.loads(file.read())
+    with open("profit_relics.json", "rb") as file:
+        profit_relics = orjson.loads(file.read())
+
+    # Index the relics by lowercase name once instead of scanning the lists per input
+    relic_values = {x[0].lower(): x for x in sorted_relics}
+    relic_profits = {x[0].lower(): x for x in profit_relics}
 
     def handle_mode_input() -> str:
         mode = input("Select mode:\n1. Value\n2. Profit\nq. Quit\nEnter mode: ").strip()
@@ -347,7 +539,7 @@ def open_menu():
         relic = input("Enter relic (enter list for 25 best): ")
         if relic.lower() == "list":
             return "list"
-        elif relic.lower() in [x[0].lower() for x in sorted_relics]:
+        elif relic.lower() in relic_values:
             return relic
         elif relic == "q":
             return "quit"
@@ -364,45 +556,77 @@ def open_menu():
             mode = "quit"
             break
         if mode == "value":
-            for relic_data in sorted_relics:
-                if relic == "list":
-                    for relic_data in sorted_relics[0:25]:
-                        print(f"{relic_data[0]}: {relic_data[1]['value']:.2f}p")
-                    break
-                if relic.lower() == relic_data[0].lower():
+            if relic == "list":
+                for relic_data in sorted_relics[0:25]:
                     print(f"{relic_data[0]}: {relic_data[1]['value']:.2f}p")
-                    break
+            else:
+                relic_data = relic_values[relic.lower()]
+                print(f"{relic_data[0]}: {relic_data[1]['value']:.2f}p")
         elif mode == "profit":
-            for relic_data in profit_relics:
-                if relic == "list":
-                    for relic_data in profit_relics[0:25]:
-                        print(f"{relic_data[0]}: {relic_data[1]:.2f}")
-                    break
-                if relic.lower() == relic_data[0].lower():
+            if relic == "list":
+                for relic_data in profit_relics[0:25]:
                     print(f"{relic_data[0]}: {relic_data[1]:.2f}")
-                    break
+            else:
+                relic_data = relic_profits[relic.lower()]
+                print(f"{relic_data[0]}: {relic_data[1]:.2f}")
 
 
-async def main(pool_size: int):
+async def main(pool_size: int, progress: bool = False):
     """Main function"""
 
-    sem = asyncio.Semaphore(pool_size)
+    # Tasks that finish without suspending skip a trip through the event loop (3.12+)
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+    # Requests queue up for a free connection, so waiting on the pool must not time out.
+    # The drop table is several megabytes, which can take longer than httpx's
+    # default 5 seconds to download
+    limits = httpx.Limits(
+        max_connections=pool_size, max_keepalive_connections=pool_size
+    )
+    timeout = httpx.Timeout(30.0, pool=None)
 
     needs_update = check_update()
     if needs_update:
         print("Updating Relics...")
     else:
         print("Relics are up to date! (<24 hours old)")
-    get_relics(needs_update)
-    get_items(needs_update)
-    async with httpx.AsyncClient() as client:
-        await get_all_info(client, sem, "statistics", needs_update)
-        await get_all_info(client, sem, "orders", needs_update)
-    calculate_relic_values()
-    
+    # One client for every request so connections are reused across endpoints.
+    # HTTP/2 multiplexes the market requests over a few connections, the number of
+    # requests in flight is bounded by get_all_info's workers
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, http2=True) as client:
+        relics = await get_relics(client, needs_update)
+        # Parsing the items blocks, keep it off the event loop
+        items = await asyncio.to_thread(get_items, needs_update, relics, progress)
+        limiter = AsyncLimiter(MARKET_RATE_LIMIT, 1)
+        for item_api_uri in ("statistics", "orders"):
+            await get_all_info(
+                client,
+                limiter,
+                item_api_uri,
+                needs_update,
+                relics,
+                items,
+                workers=pool_size,
+            )
+    calculate_relic_values(relics=relics, progress=progress)
+
     open_menu()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rank Warframe relics by value and profit"
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="show progress bars while parsing items and calculating prices",
+    )
+    args = parser.parse_args()
+
     POOL_SIZE = 10
-    asyncio.run(main(POOL_SIZE))
+    if uvloop is not None:
+        uvloop.run(main(POOL_SIZE, args.progress))
+    else:
+        asyncio.run(main(POOL_SIZE, args.progress))